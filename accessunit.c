@@ -948,8 +948,15 @@ extern int get_next_access_unit(access_unit_context_p context,
                                 access_unit_p        *ret_access_unit)
 {
   int            err;
+  int            finished;
   nal_unit_p     nal = NULL;
   access_unit_p  access_unit;
+  // The pending list lives for as long as the context does, so we can
+  // safely load the pointer once, rather than retrieving it from the
+  // context on every use round the loop (the compiler can't do this for
+  // us, as it can't see that the functions we pass `context` to leave
+  // the field alone)
+  nal_unit_list_p  pending_list = context->pending_list;
 
   // Is there anything more to read from the input stream?
   if (context->no_more_data)
@@ -967,10 +974,10 @@ extern int get_next_access_unit(access_unit_context_p context,
   if (context->pending_nal != NULL)
   {
     err = access_unit_append(access_unit,
-                             context->pending_nal,TRUE,context->pending_list);
+                             context->pending_nal,TRUE,pending_list);
     if (err) goto give_up;
     context->pending_nal = NULL;
-    reset_nal_unit_list(context->pending_list,FALSE);
+    reset_nal_unit_list(pending_list,FALSE);
   }
   
   for (;;)
@@ -1000,8 +1007,23 @@ extern int get_next_access_unit(access_unit_context_p context,
       goto give_up;
     }
     
-    if (nal_is_slice(nal))
+    // Dispatch on the NAL unit type. ``nal_is_slice`` is true for exactly
+    // nal_unit_type 1 (non-IDR) and 5 (IDR), so the whole decision can be
+    // made with a single switch on the type - this is the innermost loop
+    // of access unit assembly, and a switch lets the compiler dispatch
+    // via a jump table rather than a chain of comparisons.
+    //
+    // Note that a ``break`` within the switch only leaves the switch, so
+    // the branches that used to break out of the reading loop instead set
+    // `finished`.
+    finished = FALSE;
+    // (the cast is because we have cases for the reserved types 13..18,
+    // which have no enumeration names)
+    switch ((int)nal->nal_unit_type)
     {
+    case NAL_NON_IDR:
+    case NAL_IDR:
+      // It's a slice
       if (!access_unit->started_primary_picture)
       {
         // We're in a new access unit, but we haven't had a slice
@@ -1011,9 +1033,9 @@ extern int get_next_access_unit(access_unit_context_p context,
         // unit in the bitstream starts with an IDR, which might be
         // a good idea)
         nal->start_reason = "First slice of new access unit";
-        err = access_unit_append(access_unit,nal,TRUE,context->pending_list);
+        err = access_unit_append(access_unit,nal,TRUE,pending_list);
         if (err) goto give_up_free_nal;
-        reset_nal_unit_list(context->pending_list,FALSE);
+        reset_nal_unit_list(pending_list,FALSE);
         err = remember_earlier_primary_start(context,nal);
         if (err) goto give_up_free_nal;
       }
@@ -1029,14 +1051,14 @@ extern int get_next_access_unit(access_unit_context_p context,
           // picture, so this NAL unit must start a new access unit.
           // Remember it for next time, and return the access unit so far.
           context->pending_nal = nal;
-          break;  // Ready to return the access unit
+          finished = TRUE;  // Ready to return the access unit
         }
         else
         {
           // This access unit was waiting for its primary picture
-          err = access_unit_append(access_unit,nal,TRUE,context->pending_list);
+          err = access_unit_append(access_unit,nal,TRUE,pending_list);
           if (err) goto give_up_free_nal;
-          reset_nal_unit_list(context->pending_list,FALSE);
+          reset_nal_unit_list(pending_list,FALSE);
         }
       }
       else if (!access_unit->started_primary_picture)
@@ -1061,24 +1083,24 @@ extern int get_next_access_unit(access_unit_context_p context,
       else
       {
         // We're part of the same access unit, but not special
-        err = access_unit_append(access_unit,nal,FALSE,context->pending_list);
+        err = access_unit_append(access_unit,nal,FALSE,pending_list);
         if (err) goto give_up_free_nal;
-        reset_nal_unit_list(context->pending_list,FALSE);
+        reset_nal_unit_list(pending_list,FALSE);
       }
-    }
-    else if (nal->nal_unit_type == NAL_ACCESS_UNIT_DELIM)
-    {
+      break;
+
+    case NAL_ACCESS_UNIT_DELIM:
       // We always start an access unit...
       if (access_unit->started_primary_picture)
       {
-        err = append_to_nal_unit_list(context->pending_list,nal);
+        err = append_to_nal_unit_list(pending_list,nal);
         if (err) goto give_up_free_nal;
-        break; // Ready to return the "previous" access unit
+        finished = TRUE; // Ready to return the "previous" access unit
       }
       else
       {
         // The current access unit doesn't yet have any VCL NALs
-        if (context->pending_list->length > 0 ||
+        if (pending_list->length > 0 ||
             access_unit->nal_units->length > 0)
         {
           print_err("!!! Ignoring incomplete access unit:\n");
@@ -1087,42 +1109,35 @@ extern int get_next_access_unit(access_unit_context_p context,
             report_nal_unit_list(FALSE,"    ",access_unit->nal_units);
             reset_nal_unit_list(access_unit->nal_units,TRUE);
           }
-          if (context->pending_list->length > 0)
+          if (pending_list->length > 0)
           {
-            report_nal_unit_list(FALSE,"    ",context->pending_list);
-            reset_nal_unit_list(context->pending_list,TRUE);
+            report_nal_unit_list(FALSE,"    ",pending_list);
+            reset_nal_unit_list(pending_list,TRUE);
           }
         }
         err = access_unit_append(access_unit,nal,FALSE,NULL);
         if (err) goto give_up_free_nal;
       }
-    }
-    else if (nal->nal_unit_type == NAL_SEI)
-    {
+      break;
+
+    case NAL_SEI:
       // SEI units always precede the primary coded picture
       // - so they also implicitly end any access unit that has already
       // started its primary picture
+      err = append_to_nal_unit_list(pending_list,nal);
+      if (err) goto give_up_free_nal;
       if (access_unit->started_primary_picture)
-      {
-        err = append_to_nal_unit_list(context->pending_list,nal);
-        if (err) goto give_up_free_nal;
-        break; // Ready to return the "previous" access unit
-      }
-      else
-      {
-        err = append_to_nal_unit_list(context->pending_list,nal);
-        if (err) goto give_up_free_nal;
-      }
-    }
-    else if (nal->nal_unit_type == NAL_SEQ_PARAM_SET || 
-             nal->nal_unit_type == NAL_PIC_PARAM_SET ||
-             nal->nal_unit_type == 13 ||
-             nal->nal_unit_type == 14 ||
-             nal->nal_unit_type == 15 ||
-             nal->nal_unit_type == 16 ||
-             nal->nal_unit_type == 17 ||
-             nal->nal_unit_type == 18)
-    {
+        finished = TRUE; // Ready to return the "previous" access unit
+      break;
+
+    case NAL_SEQ_PARAM_SET:
+    case NAL_PIC_PARAM_SET:
+    case 13:
+    case 14:
+    case 15:
+    case 16:
+    case 17:
+    case 18:
       // These start a new access unit *if* they come after the
       // last VCL NAL of an access unit. But we can only *tell*
       // that they are after the last VCL NAL of an access unit
@@ -1131,30 +1146,30 @@ extern int get_next_access_unit(access_unit_context_p context,
       // (i.e., they'll get added to an access unit just before
       // the next "more determined" NAL unit we add to an access
       // unit)
-      err = append_to_nal_unit_list(context->pending_list,nal);
+      err = append_to_nal_unit_list(pending_list,nal);
       if (err) goto give_up_free_nal;
-    }
-    else if (nal->nal_unit_type == NAL_END_OF_SEQ)
-    {
-      if (context->pending_list->length > 0)
+      break;
+
+    case NAL_END_OF_SEQ:
+      if (pending_list->length > 0)
       {
         print_err("!!! Ignoring items after last VCL NAL and"
                   " before End of Sequence:\n");
-        report_nal_unit_list(FALSE,"    ",context->pending_list);
-        reset_nal_unit_list(context->pending_list,TRUE);
+        report_nal_unit_list(FALSE,"    ",pending_list);
+        reset_nal_unit_list(pending_list,TRUE);
       }
       // And remember this as the End of Sequence marker
       context->end_of_sequence = nal;
+      finished = TRUE;
       break;
-    }
-    else if (nal->nal_unit_type == NAL_END_OF_STREAM)
-    {
-      if (context->pending_list->length > 0)
+
+    case NAL_END_OF_STREAM:
+      if (pending_list->length > 0)
       {
         print_err("!!! Ignoring items after last VCL NAL and"
                   " before End of Stream:\n");
-        report_nal_unit_list(FALSE,"    ",context->pending_list);
-        reset_nal_unit_list(context->pending_list,TRUE);
+        report_nal_unit_list(FALSE,"    ",pending_list);
+        reset_nal_unit_list(pending_list,TRUE);
       }
       // And remember this as the End of Stream marker
       context->end_of_stream = nal;
@@ -1162,16 +1177,20 @@ extern int get_next_access_unit(access_unit_context_p context,
       // (setting no_more_data like this means that *next* time this
       // function is called, it will return EOF)
       context->no_more_data = TRUE;
+      finished = TRUE;
       break;
-    }
-    else
-    {
+
+    default:
       // It's not a slice, or an access unit delimiter, or an
       // end of sequence or stream, or a sequence or picture
       // parameter set, or various other odds and ends, so it
       // looks like we can ignore it.
       free_nal_unit(&nal);
+      break;
     }
+
+    if (finished)
+      break;  // The access unit in hand is ready to return
   }
 
   // Check for an immediate "end of file with no data"
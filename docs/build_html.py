@@ -6,8 +6,9 @@ required. It's not in the Makefile because I'm not yet sure it belongs there...
 
 Requires Python and docutils.
 
-Uses rst2html.py on individual files because that seems to be available
-more often than the buildhtml.py script.
+Calls docutils directly (docutils.core.publish_file) on individual files,
+rather than shelling out to rst2html, so the cost of starting Python and
+importing docutils is paid once rather than once per file.
 """
 
 # ***** BEGIN LICENSE BLOCK *****
@@ -36,14 +37,20 @@ more often than the buildhtml.py script.
 
 import os
 
+from docutils.core import publish_file
+
 def main():
+    overrides = {'stylesheet_path': 'default.css',
+                 'embed_stylesheet': True}
     filenames = os.listdir('.')
     for name in filenames:
         base,ext = os.path.splitext(name)
         if ext == '.txt':
-            print 'Processing',name
-            os.system('rst2html --stylesheet-path=default.css'
-                      ' --embed-stylesheet %s > %s'%(name,base+'.html'))
+            print('Processing',name)
+            publish_file(source_path=name,
+                         destination_path=base+'.html',
+                         writer_name='html',
+                         settings_overrides=overrides)
 
 
 if __name__ == "__main__":
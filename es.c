@@ -517,40 +517,81 @@ static int find_ES_unit_start(ES_p       es,
   // "over" the start of the next unit
   for (;;)
   {
-    byte  *ptr;
-    for (ptr = es->data_ptr; ptr < es->data_end; ptr++)
+    byte  *start = es->data_ptr;
+    byte  *end   = es->data_end;
+    byte  *ptr   = start;
+    int    found = FALSE;
+
+    // The 00 00 of a start code prefix may lie (partly) in the previous
+    // buffer-full, so check the first two positions against the bytes
+    // carried over from last time
+    for (; ptr < end && ptr - start < 2; ptr++)
     {
       if (prev2 == 0x00 && prev1 == 0x00 && *ptr == 0x01)
       {
-        es->prev1_byte = es->prev2_byte = 0x00;
-        es->cur_byte = 0x01;
-        if (es->reading_ES)
-        {
-          unit->start_posn.infile = es->read_ahead_posn + (ptr - es->data) - 2;
-        }
-        else
-        {
-          unit->start_posn.infile = es->reader->packet->posn;
-          unit->start_posn.inpacket = (ptr - es->data) - 2;
-          if (unit->start_posn.inpacket < 0)
-          {
-            unit->start_posn.infile = es->last_packet_posn;
-            unit->start_posn.inpacket += es->last_packet_es_data_len;
-          }
-          // Does the PES packet that we are starting in have a PTS?
-          unit->PES_had_PTS = es->reader->packet->has_PTS;
-        }
-        es->data_ptr = ptr + 1; // the *next* byte to read
-        unit->data[0] = 0x00;   // i.e., the values we just read
-        unit->data[1] = 0x00;
-        unit->data[2] = 0x01;
-        unit->data_len = 3;
-        return 0;
+        found = TRUE;
+        break;
       }
       prev2 = prev1;
       prev1 = *ptr;
     }
 
+    // Thereafter, all three bytes of any candidate prefix are within this
+    // buffer, so rather than inspecting every byte in turn we can leap
+    // from one 01 byte to the next with memchr (which any modern C library
+    // vectorises), and just validate the two preceding bytes at each
+    // candidate
+    while (!found && ptr < end)
+    {
+      ptr = memchr(ptr,0x01,end - ptr);
+      if (ptr == NULL)
+      {
+        ptr = end;
+        break;
+      }
+      if (ptr[-2] == 0x00 && ptr[-1] == 0x00)
+        found = TRUE;
+      else
+        ptr++;
+    }
+
+    // Remember the last two bytes for the boundary checks on the next
+    // buffer-full (shorter buffers were wholly dealt with byte by byte
+    // above, which kept these up to date as it went)
+    if (!found && end - start >= 2)
+    {
+      prev2 = end[-2];
+      prev1 = end[-1];
+    }
+
+    if (found)
+    {
+      es->prev1_byte = es->prev2_byte = 0x00;
+      es->cur_byte = 0x01;
+      if (es->reading_ES)
+      {
+        unit->start_posn.infile = es->read_ahead_posn + (ptr - es->data) - 2;
+      }
+      else
+      {
+        unit->start_posn.infile = es->reader->packet->posn;
+        unit->start_posn.inpacket = (ptr - es->data) - 2;
+        if (unit->start_posn.inpacket < 0)
+        {
+          unit->start_posn.infile = es->last_packet_posn;
+          unit->start_posn.inpacket += es->last_packet_es_data_len;
+        }
+        // Does the PES packet that we are starting in have a PTS?
+        unit->PES_had_PTS = es->reader->packet->has_PTS;
+      }
+      es->data_ptr = ptr + 1; // the *next* byte to read
+      unit->data[0] = 0x00;   // i.e., the values we just read
+      unit->data[1] = 0x00;
+      unit->data[2] = 0x01;
+      unit->data_len = 3;
+      return 0;
+    }
+
     // We've run out of data - get some more
     err = get_more_data(es);
     if (err) return err;
@@ -584,6 +625,30 @@ static int find_ES_unit_start(ES_p       es,
  * Note that finding end-of-file is not counted as an error - it is
  * assumed that it is just the natural end of the ES unit.
  */
+static inline int append_to_ES_unit_data(ES_unit_p   unit,
+                                         const byte *data,
+                                         uint32_t    data_len)
+{
+  if (unit->data_len + data_len > unit->data_size)
+  {
+    byte     *newdata;
+    uint32_t  newsize = unit->data_size;
+    while (unit->data_len + data_len > newsize)
+      newsize += ES_UNIT_DATA_INCREMENT;
+    newdata = realloc(unit->data,newsize);
+    if (newdata == NULL)
+    {
+      print_err("### Unable to extend ES unit data array\n");
+      return 1;
+    }
+    unit->data = newdata;
+    unit->data_size = newsize;
+  }
+  memcpy(unit->data + unit->data_len,data,data_len);
+  unit->data_len += data_len;
+  return 0;
+}
+
 static int find_ES_unit_end(ES_p       es,
                             ES_unit_p  unit)
 {
@@ -592,50 +657,95 @@ static int find_ES_unit_end(ES_p       es,
   byte  prev2 = es->prev1_byte;
   for (;;)
   {
-    byte  *ptr;
-    for (ptr = es->data_ptr; ptr < es->data_end; ptr++)
+    byte  *start = es->data_ptr;
+    byte  *end   = es->data_end;
+    byte  *ptr   = start;
+    int    found = FALSE;
+
+    // Have we reached the end of our unit?
+    // We know we have if we find the next 00 00 01 start code prefix.
+    // (as stated in the header comment above, we're ignoring the H.264
+    // ability to end if we've found a 00 00 00 sequence)
+
+    // The 00 00 of that prefix may lie (partly) in the previous
+    // buffer-full, so check the first two positions against the bytes
+    // carried over from last time
+    for (; ptr < end && ptr - start < 2; ptr++)
     {
-      // Have we reached the end of our unit?
-      // We know we are if we've found the next 00 00 01 start code prefix.
-      // (as stated in the header comment above, we're ignoring the H.264
-      // ability to end if we've found a 00 00 00 sequence)
       if (prev2 == 0x00 && prev1 == 0x00 && *ptr == 0x01)
       {
-        es->data_ptr = ptr;     // remember where we've got to
-        es->prev2_byte = 0x00;  // we know prev1_byte is already 0
-        es->cur_byte = 0x01;
-        // We've read two 00 bytes we don't need into our data buffer...
-        unit->data_len -= 2;
-
-        if (es->reading_ES)
-        {
-          es->posn_of_next_byte.infile = es->read_ahead_posn +
-            (ptr - es->data) - 2;
-        }
-        else
-        {
-          es->posn_of_next_byte.infile = es->reader->packet->posn;
-          es->posn_of_next_byte.inpacket = (ptr - es->data) - 2;
-        }
-        return 0;
+        found = TRUE;
+        break;
       }
-
       // Otherwise, it's a data byte
-      if (unit->data_len == unit->data_size)
+      err = append_to_ES_unit_data(unit,ptr,1);
+      if (err) return err;
+      prev2 = prev1;
+      prev1 = *ptr;
+    }
+
+    // Thereafter, all three bytes of any candidate prefix are within this
+    // buffer, so rather than inspecting (and copying) every byte in turn,
+    // we can leap from one 01 byte to the next with memchr (which any
+    // modern C library vectorises), validate the two preceding bytes at
+    // each candidate, and copy the intervening data bytes en masse
+    while (!found && ptr < end)
+    {
+      byte *cand = memchr(ptr,0x01,end - ptr);
+      if (cand == NULL)
       {
-        int newsize = unit->data_size + ES_UNIT_DATA_INCREMENT;
-        unit->data = realloc(unit->data,newsize);
-        if (unit->data == NULL)
-        {
-          print_err("### Unable to extend ES unit data array\n");
-          return 1;
-        }
-        unit->data_size = newsize;
+        // No prefix can end in this buffer - it's all data bytes
+        err = append_to_ES_unit_data(unit,ptr,end - ptr);
+        if (err) return err;
+        ptr = end;
+        break;
+      }
+      if (cand[-2] == 0x00 && cand[-1] == 0x00)
+      {
+        // The bytes before the prefix (including its two 00 bytes,
+        // which get discounted again below) are data bytes
+        err = append_to_ES_unit_data(unit,ptr,cand - ptr);
+        if (err) return err;
+        ptr = cand;
+        found = TRUE;
+      }
+      else
+      {
+        // A 01 that is not preceded by 00 00 is just a data byte
+        err = append_to_ES_unit_data(unit,ptr,cand + 1 - ptr);
+        if (err) return err;
+        ptr = cand + 1;
       }
-      unit->data[unit->data_len++] = *ptr;
+    }
 
-      prev2 = prev1;
-      prev1 = *ptr;
+    // Remember the last two bytes for the boundary checks on the next
+    // buffer-full (shorter buffers were wholly dealt with byte by byte
+    // above, which kept these up to date as it went)
+    if (!found && end - start >= 2)
+    {
+      prev2 = end[-2];
+      prev1 = end[-1];
+    }
+
+    if (found)
+    {
+      es->data_ptr = ptr;     // remember where we've got to
+      es->prev2_byte = 0x00;  // we know prev1_byte is already 0
+      es->cur_byte = 0x01;
+      // We've read two 00 bytes we don't need into our data buffer...
+      unit->data_len -= 2;
+
+      if (es->reading_ES)
+      {
+        es->posn_of_next_byte.infile = es->read_ahead_posn +
+          (ptr - es->data) - 2;
+      }
+      else
+      {
+        es->posn_of_next_byte.infile = es->reader->packet->posn;
+        es->posn_of_next_byte.inpacket = (ptr - es->data) - 2;
+      }
+      return 0;
     }
 
     // We've run out of data (ptr == es->data_end) - get some more
@@ -1098,7 +1098,13 @@ extern int nal_is_first_VCL_NAL(nal_unit_p   nal,
                                 nal_unit_p   last)
 {
   nal_slice_data_p  this,that;
-  
+
+  // The answer is memoized on the NAL unit itself, so all the slice
+  // header comparison below happens at most once per NAL unit, however
+  // many times callers ask (the access unit loop asks while assembling,
+  // and the frame/reversing code may ask again later). A given NAL unit
+  // is only ever compared against the `last` that was current when it
+  // was read, so there is no stale-key risk in caching just the result.
   if (nal->starts_picture_decided)
     return nal->starts_picture;
 
@@ -1857,7 +1863,9 @@ extern int append_to_nal_unit_list(nal_unit_list_p  list,
 {
   if (list->length == list->size)
   {
-    int newsize = list->size + NAL_UNIT_LIST_INCREMENT;
+    // Grow geometrically, so that appending N items costs O(N) reallocs
+    // worth of copying overall, not O(N^2) as the old fixed increment did
+    int newsize = list->size * 2;
     list->array = realloc(list->array,newsize*sizeof(nal_unit_p));
     if (list->array == NULL)
     {
@@ -1911,19 +1919,20 @@ static inline void clear_nal_unit_list(nal_unit_list_p  list,
 extern void reset_nal_unit_list(nal_unit_list_p  list,
                                 int              deep)
 {
-  if (list->array != NULL)
+  // A shallow reset just forgets the entries - no need to walk the array
+  // NULLing out pointers that `length` already says are not there. That
+  // matters because the access unit reading loop shallow-resets the
+  // pending list after every slice.
+  if (deep && list->array != NULL)
   {
     int ii;
     for (ii=0; ii<list->length; ii++)
     {
-      if (deep)
+      nal_unit_p nal = list->array[ii];
+      if (nal != NULL)
       {
-        nal_unit_p nal = list->array[ii];
-        if (nal != NULL)
-        {
-          clear_nal_unit(nal);
-          free(nal);
-        }
+        clear_nal_unit(nal);
+        free(nal);
       }
       list->array[ii] = NULL;
     }
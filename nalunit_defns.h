@@ -243,7 +243,8 @@ typedef struct nal_unit_list *nal_unit_list_p;
 #define SIZEOF_NAL_UNIT_LIST sizeof(struct nal_unit_list)
 
 #define NAL_UNIT_LIST_START_SIZE  20
-#define NAL_UNIT_LIST_INCREMENT   20
+// (the array now grows by doubling, so there is no "increment" - a list
+// only ever reallocates a handful of times however long it gets)
 
 // ------------------------------------------------------------
 // A context for reading NAL units from an Elementary Stream
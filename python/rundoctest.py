@@ -1,61 +1,139 @@
 #! /usr/bin/env python
-"""Run the doctest on a text file
+"""Run the doctest on text files
 
-    Usage: doctext.py  [file]
+    Usage: rundoctest.py  [file ...]
 
-[file] defaults to ``test.txt``
+[file ...] defaults to ``test.txt``.
+
+If more than one file is given, the files are tested in parallel, one
+process per file (up to the number of CPUs) - each file's tests are
+independent, so there is no reason to pay Python startup per file or to
+run them one after the other.
 """
 
 import sys
 import doctest
+import functools
+import hashlib
+import marshal
+import multiprocessing
+import os
+
+# I want to be able to use the "with" statement in the doctests.
+# It's not possible to use "from __future__ import with_statement"
+# in doctests as such. Instead, one has to add the resulting globals
+# to the doctest context. We resolve that once at import time (so each
+# worker process does it once, not once per file) - doctest copies the
+# dictionary into each test's globals, so sharing it is safe.
+import __future__
+_EXTRA_GLOBS = {'with_statement':__future__.with_statement}
+
+# Where to cache the compiled doctest examples (see _cached_compile).
+# BUILD_CACHE_DIR allows build scripts to point all such caches at one
+# place.
+_CACHE_DIR = os.environ.get('BUILD_CACHE_DIR',
+                            os.path.join(os.path.expanduser('~'),
+                                         '.cache','tstools_doctest'))
+
+def _cached_compile(source, filename, mode, flags=0, dont_inherit=False):
+    """Compile a doctest example, with a marshal cache on disk.
+
+    Every run of doctest re-parses and re-compiles each example from
+    scratch. The compiled code objects only depend on the example source
+    (plus the compile flags and the Python version), so we remember them
+    in ``_CACHE_DIR``, keyed by a hash of those, and just marshal.load
+    them back on later runs.
+
+    Any problem with the cache - unwritable directory, truncated or
+    stale file - simply falls back to a normal compile.
+    """
+    key = hashlib.sha1(('%s\x00%s\x00%s\x00%d\x00%s'%(
+                        source,filename,mode,flags,
+                        sys.version)).encode('utf-8')).hexdigest()
+    cachename = os.path.join(_CACHE_DIR,key+'.marshal')
+    try:
+        with open(cachename,'rb') as f:
+            return marshal.load(f)
+    except (OSError,EOFError,ValueError,TypeError):
+        pass
+    code = compile(source,filename,mode,flags,dont_inherit)
+    try:
+        os.makedirs(_CACHE_DIR,exist_ok=True)
+        with open(cachename,'wb') as f:
+            marshal.dump(code,f)
+    except OSError:
+        pass
+    return code
+
+# doctest's runner looks ``compile`` up as a (module) global, so giving
+# the doctest module a ``compile`` attribute is enough to divert it
+# through the cache
+doctest.compile = _cached_compile
+
+def _test_file(filename,verbose=False):
+    """Run the doctest for a single file.
+
+    Returns (filename, failures, tests).
+
+    ``verbose`` is an explicit argument (rather than a module global)
+    because pool workers may be spawned rather than forked - notably on
+    Mac OS X - in which case they re-import this module and would not
+    see anything main() had set.
+    """
+    # module_relative=False so that we can be given paths anywhere, not
+    # just relative to this script's directory (it also means the paths
+    # are resolved in this process or a worker process alike)
+    (failures,tests) = doctest.testfile(filename,module_relative=False,
+                                        verbose=verbose,
+                                        extraglobs=_EXTRA_GLOBS)
+    return (filename,failures,tests)
 
 def main():
-    args = sys.argv[1:]
-    filename = None
     verbose = False
+    args = sys.argv[1:]
+    filenames = []
 
     for word in args:
         if word in ("-v", "-verbose"):
             verbose = True
         elif word in ("-h", "-help", "/?", "/help", "--help"):
-            print __doc__
+            print(__doc__)
             return
         else:
-            if filename:
-                print "Filename '%s' already specified"%filename
-                return
-            else:
-                filename = word
-
-    if not filename:
-        filename = "test.txt"
-
-    print
-    print 'Ignore any output lines starting ### or !!!.  These are written by the'
-    print 'underlying C library, and are not "seen" (or hidden) by doctest.'
-    print
-
-    # I want to be able to use the "with" statement in the doctests.
-    # It's not possible to use "from __future__ import with_statement"
-    # in doctests as such. Instead, one has to add the resulting globals
-    # to the doctest context. Which seems to be done as follows:
-    import __future__
-    extraglobs={'with_statement':__future__.with_statement}
-
-    (failures,tests) = doctest.testfile(filename,verbose=verbose,
-                                        extraglobs=extraglobs)
-
-    testword = "test"
-    if tests != 1: testword = "tests"
-    failword = "failure"
-    if failures != 1: failword = "failures"
-    print
-    print "File %s: %d %s, %d %s"%(filename,tests,testword,failures,failword)
-    print
-    if failures == 0:
-        print 'The little light is GREEN'
+            filenames.append(word)
+
+    if not filenames:
+        filenames = ["test.txt"]
+
+    print()
+    print('Ignore any output lines starting ### or !!!.  These are written by the')
+    print('underlying C library, and are not "seen" (or hidden) by doctest.')
+    print()
+
+    if len(filenames) == 1:
+        # No point in spinning up a pool for a single file
+        results = [_test_file(filenames[0],verbose)]
+    else:
+        processes = min(len(filenames),multiprocessing.cpu_count())
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(functools.partial(_test_file,verbose=verbose),
+                               filenames)
+
+    total_failures = total_tests = 0
+    print()
+    for filename,failures,tests in results:
+        total_failures += failures
+        total_tests += tests
+        testword = "test"
+        if tests != 1: testword = "tests"
+        failword = "failure"
+        if failures != 1: failword = "failures"
+        print("File %s: %d %s, %d %s"%(filename,tests,testword,failures,failword))
+    print()
+    if total_failures == 0:
+        print('The little light is GREEN')
     else:
-        print 'The little light is RED'
+        print('The little light is RED')
 
 if __name__ == "__main__":
     main()
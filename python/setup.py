@@ -0,0 +1,126 @@
+"""setup.py -- for building tstools Cython modules
+
+If the BUILD_CACHE_DIR environment variable is set, built extension modules
+are cached there, keyed by a hash of the sources (and the Cython and Python
+versions). A rebuild with nothing changed then just copies the cached .so
+back into place instead of re-running Cython and the C compiler.
+
+(Setting CC="ccache gcc" gives much the same effect at the C compilation
+layer, and works for the C library as well - the cache here additionally
+skips the Cython translation and the distutils machinery.)
+"""
+
+# ***** BEGIN LICENSE BLOCK *****
+# Version: MPL 1.1
+# 
+# The contents of this file are subject to the Mozilla Public License Version
+# 1.1 (the "License"); you may not use this file except in compliance with
+# the License. You may obtain a copy of the License at
+# http://www.mozilla.org/MPL/
+# 
+# Software distributed under the License is distributed on an "AS IS" basis,
+# WITHOUT WARRANTY OF ANY KIND, either express or implied. See the License
+# for the specific language governing rights and limitations under the
+# License.
+# 
+# The Original Code is the MPEG TS, PS and ES tools.
+# 
+# The Initial Developer of the Original Code is Amino Communications Ltd.
+# Portions created by the Initial Developer are Copyright (C) 2008
+# the Initial Developer. All Rights Reserved.
+# 
+# Contributor(s):
+#   Tibs (tibs@berlios.de)
+# 
+# ***** END LICENSE BLOCK *****
+
+import glob
+import hashlib
+import os
+import shutil
+import sys
+
+from setuptools import setup
+from setuptools.extension import Extension
+import Cython
+from Cython.Build import cythonize
+
+def _build_key():
+    """A hash identifying this build - same key, same .so.
+
+    The built module depends on the Cython sources, the C library we link
+    against, and the Cython and Python versions.
+    """
+    sha = hashlib.sha1()
+    # Every .pxd file that tstools.pyx cimports must be in here, or
+    # editing it would still hit the cache and reinstate a stale build
+    for filename in ('tstools/tstools.pyx','tstools/common.pxd',
+                     'tstools/cwrapper.pxd','../lib/libtstools.a'):
+        try:
+            with open(filename,'rb') as f:
+                sha.update(f.read())
+        except IOError:
+            pass        # e.g., the library not built yet - just a cache miss
+    sha.update(Cython.__version__.encode('utf-8'))
+    sha.update(sys.version.encode('utf-8'))
+    return sha.hexdigest()
+
+def _built_so():
+    """The .so we build in-place, or None if it's not there."""
+    names = glob.glob('tstools/tstools*.so')
+    return names[0] if names else None
+
+# The cache only makes sense when we're actually building - "clean",
+# "sdist" and so on must fall through to setup() as normal (short
+# circuiting "clean" would *reinstate* the .so it is meant to remove)
+cache_dir = os.environ.get('BUILD_CACHE_DIR')
+if 'build_ext' not in sys.argv:
+    cache_dir = None
+if cache_dir:
+    # Cache entries are <key>-<original .so name>, so that we reinstate
+    # the module under its proper ABI-tagged filename (e.g.,
+    # tstools.cpython-311-x86_64-linux-gnu.so) - a leftover ABI-tagged
+    # .so would shadow anything restored under a plainer name
+    matches = glob.glob(os.path.join(cache_dir,_build_key()+'-*.so'))
+    if matches:
+        cached = matches[0]
+        print('Using cached',cached)
+        soname = os.path.basename(cached).split('-',1)[1]
+        shutil.copy(cached,os.path.join('tstools',soname))
+        sys.exit(0)
+
+tstools = Extension("tstools.tstools",
+                    ['tstools/tstools.pyx'],
+                    include_dirs=['..'],
+                    library_dirs=['../lib'],
+                    libraries=['tstools'],
+                    extra_compile_args=['-O3','-fno-strict-aliasing'],
+                    )
+setup(
+  name = 'tstools',
+  # All the real work in the wrapper happens in the C library, but there's
+  # no reason to pay for bounds/wraparound checking on the C-level loops
+  # that remain, nor for Python division semantics on C integers
+  # include_path lets Cython resolve our same-package cimports ("from
+  # common cimport ...") - under language level 3 it no longer looks in
+  # the .pyx file's own directory by default
+  ext_modules=cythonize([tstools],
+                        include_path=['tstools'],
+                        compiler_directives={'language_level':3,
+                                             'boundscheck':False,
+                                             'wraparound':False,
+                                             'initializedcheck':False,
+                                             'cdivision':True})
+)
+
+if cache_dir:
+    built = _built_so()
+    if built:
+        cached = os.path.join(cache_dir,
+                              _build_key()+'-'+os.path.basename(built))
+        try:
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            shutil.copy(built,cached)
+        except (IOError,OSError) as err:
+            print('Not caching %s: %s'%(built,err))
@@ -36,4 +36,6 @@ I can test most easily!
 
 # The following also makes available the "sys" and "array" modules as
 # imported to tsools, so is probably not the best way to do it. Ho hum.
-from tstools import *
+# (This needs to be an explicit relative import under Python 3 - the old
+# bare "from tstools import *" now just finds this package again.)
+from .tstools import *
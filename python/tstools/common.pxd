@@ -57,35 +57,27 @@ cdef extern from *:
     ctypedef void* const_void_ptr "const void*"
     ctypedef char* const_char_ptr "const char*"
 
-# Copied from the Pyrex documentation...
+# Copied from the Pyrex documentation (as PyString_*), and renamed to the
+# PyBytes_* forms for Python 3 - "byte data" in tstools is bytes, not text
 cdef extern from "Python.h":
-    # Return a new string object with a copy of the string v as value and
+    # Return a new bytes object with a copy of the string v as value and
     # length len on success, and NULL on failure. If v is NULL, the contents of
-    # the string are uninitialized.
-    object PyString_FromStringAndSize(char *v, int len)
+    # the bytes object are uninitialized.
+    object PyBytes_FromStringAndSize(char *v, Py_ssize_t len)
 
     # Return a NUL-terminated representation of the contents of the object obj
-    # through the output variables buffer and length. 
+    # through the output variables buffer and length.
     #
-    # The function accepts both string and Unicode objects as input. For
-    # Unicode objects it returns the default encoded version of the object. If
-    # length is NULL, the resulting buffer may not contain NUL characters; if
-    # it does, the function returns -1 and a TypeError is raised. 
-    #
-    # The buffer refers to an internal string buffer of obj, not a copy. The
-    # data must not be modified in any way, unless the string was just created
-    # using PyString_FromStringAndSize(NULL, size). It must not be deallocated.
-    # If string is a Unicode object, this function computes the default
-    # encoding of string and operates on that. If string is not a string object
-    # at all, PyString_AsStringAndSize() returns -1 and raises TypeError.
-    int PyString_AsStringAndSize(object obj, char **buffer, Py_ssize_t* length) except -1
-
-    # Returns a pointer to a read-only memory location containing arbitrary
-    # data. The obj argument must support the single-segment readable buffer
-    # interface. On success, returns 0, sets buffer to the memory location and
-    # buffer_len to the buffer length. Returns -1 and sets a TypeError on
-    # error.
-    int PyObject_AsReadBuffer(object obj, const_void_ptr *buffer, Py_ssize_t *buffer_len) except -1
+    # The buffer refers to an internal buffer of obj, not a copy. The
+    # data must not be modified in any way, unless the object was just created
+    # using PyBytes_FromStringAndSize(NULL, size). It must not be deallocated.
+    # If obj is not a bytes object at all, PyBytes_AsStringAndSize() returns
+    # -1 and raises TypeError.
+    int PyBytes_AsStringAndSize(object obj, char **buffer, Py_ssize_t* length) except -1
+
+    # (Arbitrary read-only data used to be reached with
+    # PyObject_AsReadBuffer, but that went away in Python 3.12 - code
+    # that needs it should use the buffer protocol, via cpython.buffer.)
 
     # Unfortunately, there are two common ways of implementing a va_list,
     # and we just have to guess which is being used. For the moment, though,
@@ -180,7 +180,9 @@ cdef extern from 'nalunit_defns.h':
 
 cdef extern from 'accessunit_defns.h':
     struct access_unit_context:
-        pass
+        nal_unit_p      end_of_sequence
+        nal_unit_p      end_of_stream
+        uint32_t        access_unit_index
     ctypedef access_unit_context *access_unit_context_p
     struct access_unit:
         uint32_t        index
@@ -189,14 +191,22 @@ cdef extern from 'accessunit_defns.h':
         nal_unit_p      primary_start       # within nal_units
         # Contents
         nal_unit_list_p nal_units
+        int             ignored_broken_NAL_units
+        uint32_t        frame_num
+        byte            field_pic_flag
+        byte            bottom_field_flag
+    ctypedef access_unit *access_unit_p
 
 cdef extern from 'nalunit_fns.h':
     int build_nal_unit_context(ES_p es, nal_unit_context_p *context)
     void free_nal_unit_context(nal_unit_context_p *context)
     int rewind_nal_unit_context(nal_unit_context_p context)
     void free_nal_unit(nal_unit_p *nal)
+    # The NAL scan is pure C (read + bit-parse, no Python state), so we
+    # let callers release the GIL around it - see the note by
+    # get_next_access_unit below
     int find_next_NAL_unit(nal_unit_context_p context, int verbose,
-                           nal_unit_p *nal)
+                           nal_unit_p *nal) nogil
     int nal_is_slice(nal_unit_p nal)
     int nal_is_pic_param_set(nal_unit_p nal)
     int nal_is_seq_param_set(nal_unit_p nal)
@@ -212,18 +222,25 @@ cdef extern from 'accessunit_fns.h':
     int build_access_unit_context(ES_p es, access_unit_context_p *context)
     void free_access_unit_context(access_unit_context_p *context)
     int rewind_access_unit_context(access_unit_context_p context)
-    void free_access_unit(access_unit_context_p *acc_unit)
-    int get_access_unit_bounds(access_unit_context_p access_unit, ES_offset *start,
+    void free_access_unit(access_unit_p *acc_unit)
+    void report_access_unit(access_unit_p access_unit)
+    int get_access_unit_bounds(access_unit_p access_unit, ES_offset *start,
                                uint32_t *length)
-    int all_slices_I(access_unit_context_p access_unit)
-    int all_slices_P(access_unit_context_p access_unit)
-    int all_slices_I_or_P(access_unit_context_p access_unit)
-    int all_slices_B(access_unit_context_p access_unit)
+    int all_slices_I(access_unit_p access_unit)
+    int all_slices_P(access_unit_p access_unit)
+    int all_slices_I_or_P(access_unit_p access_unit)
+    int all_slices_B(access_unit_p access_unit)
+    # These spend nearly all their time in find_next_NAL_unit (above), and
+    # touch no Python state, so they are declared nogil - each context is
+    # independent, so threads reading different streams can then really run
+    # in parallel. Note that any printing they do goes through the
+    # redirectable printing functions, so the Python-side print callbacks
+    # in tstools.pyx must be 'with gil'.
     int get_next_access_unit(access_unit_context_p context, int quiet,
-                             int show_details, access_unit_context_p *ret_access_unit)
+                             int show_details, access_unit_p *ret_access_unit) nogil
     int get_next_h264_frame(access_unit_context_p context, int quiet,
-                            int show_details, access_unit_context_p *frame)
-    int access_unit_has_PTS(access_unit_context_p access_unit)
+                            int show_details, access_unit_p *frame) nogil
+    int access_unit_has_PTS(access_unit_p access_unit)
 
 cdef extern from 'printing_fns.h':
     void print_msg(const_char_ptr text)
@@ -1,4 +1,8 @@
-"""tstools.pyx -- Pyrex bindings for the tstools library
+"""tstools.pyx -- Cython bindings for the tstools library
+
+This started life as Pyrex, and is now compiled as Cython with
+``language_level=3`` - so strings are unicode, and byte data (ES unit
+data, TS packet payloads, and so on) is ``bytes``.
 
 This is being developed on a Mac, running OS X, and also tested on my Ubuntu
 system at work.
@@ -64,11 +68,13 @@ choices, but perhaps not as elegant as I'd wish.
 import sys
 import array
 
+from cpython.object cimport Py_LT, Py_LE, Py_EQ, Py_NE, Py_GT, Py_GE
+
 from common cimport FILE, EOF, stdout, fopen, fclose, fileno
 from common cimport errno, strerror, free
-from common cimport const_void_ptr
-from common cimport PyString_FromStringAndSize, PyString_AsStringAndSize, \
-                    PyObject_AsReadBuffer
+from common cimport PyBytes_FromStringAndSize, PyBytes_AsStringAndSize
+from cpython.buffer cimport PyObject_GetBuffer, PyBuffer_Release, \
+                            PyBUF_SIMPLE
 from common cimport uint8_t, uint16_t, uint32_t, uint64_t
 from common cimport int8_t, int16_t, int32_t, int64_t
 from common cimport offset_t, byte, PID
@@ -78,6 +84,9 @@ cimport cwrapper
 from cwrapper cimport ES, ES_p, ES_offset, ES_unit, ES_unit_p
 from cwrapper cimport TS_reader, TS_reader_p, pidint_list, pidint_list_p
 from cwrapper cimport pmt_stream, pmt_stream_p, pmt, pmt_p
+from cwrapper cimport nal_unit_p, nal_unit_list_p
+from cwrapper cimport access_unit, access_unit_p, \
+                      access_unit_context, access_unit_context_p
 
 # Is this the best thing to do?
 class TSToolsException(Exception):
@@ -109,16 +118,22 @@ cdef extern from "Python.h":
     # format and the variable argument list va. Unix man page vsnprintf(2).
     int PyOS_vsnprintf(char *str, int size, const_char_ptr format, va_list va)
 
-cdef void our_print_msg(const_char_ptr text):
-    PySys_WriteStdout('%s',text)
+# These callbacks are all 'with gil', since the C library may call them
+# from code we have wrapped in 'with nogil' (notably the access unit
+# reading functions). They are also all 'noexcept' - the C library has
+# nowhere sensible for a Python exception to go, and without it Cython 3
+# would give them an implicit 'except *', which doesn't match the plain
+# C function pointers that redirect_output() wants
+cdef void our_print_msg(const_char_ptr text) noexcept with gil:
+    PySys_WriteStdout(b'%s',text)
 
-cdef void our_format_msg(const_char_ptr format, va_list arg_ptr):
+cdef void our_format_msg(const_char_ptr format, va_list arg_ptr) noexcept with gil:
     cdef int err
     cdef char buffer[1000]
     PyOS_vsnprintf(buffer, 1000, format, arg_ptr)
-    PySys_WriteStdout('%s',buffer)
+    PySys_WriteStdout(b'%s',buffer)
 
-cdef void our_flush():
+cdef void our_flush() noexcept:
     pass
 
 def setup_printing():
@@ -126,29 +141,29 @@ def setup_printing():
     err = cwrapper.redirect_output(our_print_msg, our_print_msg,
                           our_format_msg, our_format_msg, our_flush)
     if err:
-        raise TSToolsException, 'Setting output redirection FAILED'
+        raise TSToolsException('Setting output redirection FAILED')
 
-cdef void our_doctest_print_msg(const_char_ptr text):
-    print 'YY ' + text,
+cdef void our_doctest_print_msg(const_char_ptr text) noexcept with gil:
+    print('YY ' + (<bytes>text).decode('utf-8'), end='')
 
-cdef void our_doctest_format_msg(const_char_ptr format, va_list arg_ptr):
+cdef void our_doctest_format_msg(const_char_ptr format, va_list arg_ptr) noexcept with gil:
     cdef int err
     cdef char buffer[1000]
     PyOS_vsnprintf(buffer, 1000, format, arg_ptr)
-    print 'XX ' + buffer,
+    print('XX ' + (<bytes>buffer).decode('utf-8'), end='')
 
 def setup_printing_for_doctest():
     cdef int err
     err = cwrapper.redirect_output(our_doctest_print_msg, our_doctest_print_msg,
                           our_doctest_format_msg, our_doctest_format_msg, our_flush)
     if err:
-        raise TSToolsException, 'Setting doctest output redirection FAILED'
+        raise TSToolsException('Setting doctest output redirection FAILED')
     else:
-        print 'Printing redirected for doctest'
+        print('Printing redirected for doctest')
 
 def test_printing():
-    cwrapper.print_msg('Message\n')
-    cwrapper.print_err('Error\n')
+    cwrapper.print_msg(b'Message\n')
+    cwrapper.print_err(b'Error\n')
     #cwrapper.fprint_msg('Message "%s"\n','Fred')
     #cwrapper.fprint_err('Error "%s"\n','Fred')
 
@@ -164,8 +179,9 @@ cdef _hexify_C_byte_array(byte *bytes, int bytes_len):
 
     Doesn't leave any spaces between hex bytes.
     """
+    cdef int ii
     words = []
-    for 0 <= ii < bytes_len:
+    for ii in range(bytes_len):
         words.append('\\x%02x'%bytes[ii])
     return ''.join(words)
 
@@ -212,26 +228,33 @@ cdef class ESOffset:
         return '%08d/%08d'%(self.inpacket,self.infile)
 
     def report(self):
-        print 'Offset %d in packet at offset %d in file'%(self.inpacket,self.infile)
-
-    def __cmp__(self,other):
-        if self.infile > other.infile:
-            return 1
-        elif self.infile < other.infile:
-            return -1
-        elif self.inpacket > other.inpacket:
-            return 1
-        elif self.inpacket < other.inpacket:
-            return -1
+        print('Offset %d in packet at offset %d in file'%(self.inpacket,self.infile))
+
+    # (This used to be a __cmp__ method, but extension types only get
+    # rich comparison under Python 3)
+    def __richcmp__(self,other,op):
+        this = (self.infile,self.inpacket)
+        that = (other.infile,other.inpacket)
+        if op == Py_LT:
+            return this < that
+        elif op == Py_LE:
+            return this <= that
+        elif op == Py_EQ:
+            return this == that
+        elif op == Py_NE:
+            return this != that
+        elif op == Py_GT:
+            return this > that
         else:
-            return 0
+            return this >= that
 
 cdef same_ES_unit(ES_unit_p this, ES_unit_p that):
     """Two ES units do not need to be at the same place to be the same.
     """
+    cdef int ii
     if this.data_len != that.data_len:
         return False
-    for 0 <= ii < this.data_len:
+    for ii in range(this.data_len):
         if this.data[ii] != that.data[ii]:
             return False
     return True
@@ -246,7 +269,7 @@ cdef object compare_ESUnits(ESUnit this, ESUnit that, int op):
         return not same_ES_unit(this.unit, that.unit)
     else:
         #return NotImplementedError
-        raise TypeError, 'ESUnit only supports == and != comparisons'
+        raise TypeError('ESUnit only supports == and != comparisons')
 
 cdef class ESUnit:
     """A Python class representing an ES unit.
@@ -263,10 +286,10 @@ cdef class ESUnit:
         cdef char       *buffer
         cdef Py_ssize_t  length
         if data:
-            PyString_AsStringAndSize(data, &buffer, &length)
+            PyBytes_AsStringAndSize(data, &buffer, &length)
             retval = cwrapper.build_ES_unit_from_data(&self.unit, <byte *>buffer, length);
             if retval < 0:
-                raise TSToolsException,'Error building ES unit from Python string'
+                raise TSToolsException('Error building ES unit from Python bytes')
 
     def __init__(self,data=None):
         pass
@@ -282,9 +305,10 @@ cdef class ESUnit:
         cwrapper.free_ES_unit(&self.unit)
 
     def __str__(self):
+        cdef int ii
         text = 'ES unit: start code %02x, len %4d:'%(self.unit.start_code,
                                                     self.unit.data_len)
-        for 0 <= ii < min(self.unit.data_len,8):
+        for ii in range(min(self.unit.data_len,8)):
             text += ' %02x'%self.unit.data[ii]
 
         if self.unit.data_len == 9:
@@ -294,11 +318,12 @@ cdef class ESUnit:
         return text
 
     def __repr__(self):
-        return 'ESUnit("%s")'%_hexify_C_byte_array(self.unit.data,self.unit.data_len)
+        # The b prefix matters - our data argument must be bytes
+        return 'ESUnit(b"%s")'%_hexify_C_byte_array(self.unit.data,self.unit.data_len)
 
     cdef __set_es_unit(self, ES_unit_p unit):
         if self.unit == NULL:
-            raise ValueError,'ES unit already defined'
+            raise ValueError('ES unit already defined')
         else:
             self.unit = unit
 
@@ -312,7 +337,7 @@ cdef class ESUnit:
         elif name == 'data':
             # Cast the first parameter so that the C compiler is happy
             # when compiling the (derived) tstools.c
-            return PyString_FromStringAndSize(<char *>self.unit.data, self.unit.data_len)
+            return PyBytes_FromStringAndSize(<char *>self.unit.data, self.unit.data_len)
         elif name == 'start_code':
             return self.unit.start_code
         elif name == 'PES_had_PTS':
@@ -347,15 +372,20 @@ cdef class ESFile:
     # things passed to them. Hmm, normally I'd trust myself, but let's
     # try the recommended route
     def __cinit__(self,filename,mode='r',*args,**kwargs):
-        self.file_stream = fopen(filename,mode)
+        # The C library wants encoded byte strings for the filename and mode
+        filename_b = filename.encode(sys.getfilesystemencoding()) \
+                if isinstance(filename,str) else filename
+        mode_b = mode.encode('ascii') if isinstance(mode,str) else mode
+        self.file_stream = fopen(filename_b,mode_b)
         if self.file_stream == NULL:
-            raise TSToolsException,"Error opening file '%s'"\
-                    " with (actual) mode '%s': %s"%(filename,mode,strerror(errno))
+            raise TSToolsException("Error opening file '%s'"
+                    " with (actual) mode '%s': %s"%(filename,mode,
+                                    strerror(errno).decode('utf-8')))
         self.fileno = fileno(self.file_stream)
         if mode == 'r':
             retval = cwrapper.build_elementary_stream_file(self.fileno,&self.stream)
             if retval != 0:
-                raise TSToolsException,'Error attaching elementary stream to file %s'%filename
+                raise TSToolsException('Error attaching elementary stream to file %s'%filename)
 
     def __init__(self,filename,mode='r'):
         # What should go in __init__ and what in __cinit__ ???
@@ -366,8 +396,8 @@ cdef class ESFile:
         if self.file_stream != NULL:
             retval = fclose(self.file_stream)
             if retval != 0:
-                raise TSToolsException,"Error closing file '%s':"\
-                        " %s"%(self.name,strerror(errno))
+                raise TSToolsException("Error closing file '%s':"
+                        " %s"%(self.name,strerror(errno).decode('utf-8')))
         if self.stream != NULL:
             cwrapper.free_elementary_stream(&self.stream)
 
@@ -398,13 +428,13 @@ cdef class ESFile:
         # The C function assumes it has a valid ES stream passed to it
         # = I don't think we're always called with such
         if self.stream == NULL:
-            raise TSToolsException,'No ES stream to read'
+            raise TSToolsException('No ES stream to read')
 
         retval = cwrapper.find_and_build_next_ES_unit(self.stream, &unit)
         if retval == EOF:
             raise StopIteration
         elif retval != 0:
-            raise TSToolsException,'Error getting next ES unit from file %s'%self.name
+            raise TSToolsException('Error getting next ES unit from file %s'%self.name)
 
         # From http://www.philhassey.com/blog/2007/12/05/pyrex-from-confusion-to-enlightenment/
         # Pyrex doesn't do type inference, so it doesn't detect that 'u' is allowed
@@ -444,10 +474,10 @@ cdef class ESFile:
             else:
                 raise TypeError
         except:
-            raise TypeError,'Seek argument must be one integer, two integers or an ESOffset'
+            raise TypeError('Seek argument must be one integer, two integers or an ESOffset')
         retval = cwrapper.seek_ES(self.stream,where)
         if retval != 0:
-            raise TSToolsException,"Error seeking to %s in file '%s'"%(args,self.name)
+            raise TSToolsException("Error seeking to %s in file '%s'"%(args,self.name))
         else:
             return ESOffset(where.infile,where.inpacket)
 
@@ -463,11 +493,11 @@ cdef class ESFile:
         """Write an ES unit to this stream.
         """
         if self.file_stream == NULL:
-            raise TSToolsException,'ESFile does not seem to have been opened for write'
+            raise TSToolsException('ESFile does not seem to have been opened for write')
 
         retval = cwrapper.write_ES_unit(self.file_stream,unit.unit)
         if retval != 0:
-            raise TSToolsException,'Error writing ES unit to file %s'%self.name
+            raise TSToolsException('Error writing ES unit to file %s'%self.name)
 
     def close(self):
         # Apparently we can't call the __dealloc__ method itself,
@@ -475,8 +505,8 @@ cdef class ESFile:
         if self.file_stream != NULL:
             retval = fclose(self.file_stream)
             if retval != 0:
-                raise TSToolsException,"Error closing file '%s':"\
-                        " %s"%(self.name,strerror(errno))
+                raise TSToolsException("Error closing file '%s':"
+                        " %s"%(self.name,strerror(errno).decode('utf-8')))
         if self.stream != NULL:
             cwrapper.free_elementary_stream(&self.stream)
         # And obviously we're not available any more
@@ -498,6 +528,249 @@ cdef class ESFile:
             # And allow the exception to be re-raised
             return False
 
+# =============================================================================
+# Access unit matters
+# =============================================================================
+
+cdef class AccessUnit:
+    """A Python class representing an H.264 access unit.
+
+    These are retrieved by iterating over (or calling ``read`` on) an
+    AccessUnitContext - they cannot usefully be constructed directly in
+    Python.
+    """
+
+    cdef access_unit_p unit
+
+    def __cinit__(self, *args, **kwargs):
+        pass
+
+    def __init__(self):
+        pass
+
+    def __dealloc__(self):
+        if self.unit != NULL:
+            cwrapper.free_access_unit(&self.unit)
+
+    cdef _check_unit(self):
+        # A directly constructed AccessUnit has no C access unit behind
+        # it (they only usefully come from an AccessUnitContext), so
+        # every method that dereferences self.unit must call this first,
+        # rather than crash the interpreter
+        if self.unit == NULL:
+            raise TSToolsException('AccessUnit has no underlying access unit')
+
+    def report(self):
+        """Report (briefly) on this access unit. This writes via the C
+        printing mechanisms, so use ``setup_printing()`` if Python needs
+        to capture it.
+        """
+        self._check_unit()
+        cwrapper.report_access_unit(self.unit)
+
+    def __len__(self):
+        """The number of NAL units that make up this access unit.
+        """
+        self._check_unit()
+        return self.unit.nal_units.length
+
+    def __str__(self):
+        self._check_unit()
+        return 'Access unit %d: %d NAL units'%(self.unit.index,
+                                               self.unit.nal_units.length)
+
+    def all_slices_I(self):
+        """Are all of our slices I slices?
+        """
+        self._check_unit()
+        return bool(cwrapper.all_slices_I(self.unit))
+
+    def all_slices_P(self):
+        """Are all of our slices P slices?
+        """
+        self._check_unit()
+        return bool(cwrapper.all_slices_P(self.unit))
+
+    def all_slices_I_or_P(self):
+        """Are all of our slices I or P slices?
+        """
+        self._check_unit()
+        return bool(cwrapper.all_slices_I_or_P(self.unit))
+
+    def all_slices_B(self):
+        """Are all of our slices B slices?
+        """
+        self._check_unit()
+        return bool(cwrapper.all_slices_B(self.unit))
+
+    def has_PTS(self):
+        """Did any of our NAL units come from a PES packet with a PTS?
+        """
+        self._check_unit()
+        return bool(cwrapper.access_unit_has_PTS(self.unit))
+
+    def bounds(self):
+        """Return (start, length) for this access unit, where `start` is an
+        ESOffset and `length` is a count of bytes.
+        """
+        cdef ES_offset start
+        cdef uint32_t  length
+        self._check_unit()
+        retval = cwrapper.get_access_unit_bounds(self.unit,&start,&length)
+        if retval != 0:
+            raise TSToolsException('Error working out access unit bounds')
+        return (ESOffset(start.infile,start.inpacket),length)
+
+    def __getattr__(self,name):
+        self._check_unit()
+        if name == 'index':
+            return self.unit.index
+        elif name == 'started_primary_picture':
+            return bool(self.unit.started_primary_picture)
+        elif name == 'ignored_broken_NAL_units':
+            return self.unit.ignored_broken_NAL_units
+        elif name == 'frame_num':
+            return self.unit.frame_num
+        elif name == 'field_pic_flag':
+            return self.unit.field_pic_flag
+        elif name == 'bottom_field_flag':
+            return self.unit.bottom_field_flag
+        else:
+            raise AttributeError
+
+cdef class AccessUnitContext:
+    """A Python class for reading H.264 access units from an ES file.
+
+    Create it from an ESFile that is open for read::
+
+        context = AccessUnitContext(esfile)
+
+    and then iterate over it to retrieve successive AccessUnit objects.
+
+    This used to be prototyped in (pseudo-)Python - see the commentary in
+    ``docs/get_next_access_unit.py`` - but the actual per-NAL loop is the
+    C function ``get_next_access_unit()``, which dispatches on the NAL
+    unit type with C integer comparisons rather than Python attribute
+    lookups. All this class needs to do is call it with typed locals and
+    turn its return code into the appropriate Python behaviour (the C
+    function returns 0, EOF or 1, rather than raising exceptions).
+    """
+
+    cdef access_unit_context_p context
+    cdef readonly object esfile        # Keep the ESFile alive whilst we use it
+    cdef int quiet
+    cdef int show_details
+
+    def __cinit__(self, ESFile esfile, *args, **kwargs):
+        if not esfile.is_readable():
+            raise TSToolsException(
+                    'ESFile %s is not open for read'%esfile.name)
+        retval = cwrapper.build_access_unit_context(esfile.stream,&self.context)
+        if retval != 0:
+            raise TSToolsException(
+                    'Error building access unit context for file %s'%esfile.name)
+
+    def __init__(self, esfile, quiet=True, show_details=False):
+        self.esfile = esfile
+        self.quiet = quiet
+        self.show_details = show_details
+
+    def __dealloc__(self):
+        if self.context != NULL:
+            cwrapper.free_access_unit_context(&self.context)
+
+    def __iter__(self):
+        return self
+
+    def __repr__(self):
+        if self.esfile:
+            return "<AccessUnitContext reading from '%s'>"%self.esfile.name
+        else:
+            return "<AccessUnitContext, closed>"
+
+    cdef AccessUnit _next_access_unit(self):
+        cdef int           retval
+        cdef access_unit_p unit
+        cdef AccessUnit    au
+        cdef access_unit_context_p context = self.context
+        cdef int quiet = self.quiet
+        cdef int show_details = self.show_details
+        if context == NULL:
+            raise TSToolsException('No access unit context to read')
+        # The real work (mostly the NAL unit scan) is pure C on our own
+        # context, so release the GIL around it - threads reading from
+        # *different* contexts then actually run in parallel. Sharing one
+        # AccessUnitContext between threads remains a silly thing to do.
+        with nogil:
+            retval = cwrapper.get_next_access_unit(context,quiet,
+                                                   show_details,&unit)
+        if retval == EOF:
+            raise StopIteration
+        elif retval != 0:
+            raise TSToolsException(
+                    'Error getting next access unit from file %s'%self.esfile.name)
+        au = AccessUnit()
+        au.unit = unit
+        return au
+
+    # For Pyrex classes, we define a __next__ instead of a next method
+    # in order to form our iterator
+    def __next__(self):
+        """Our iterator interface retrieves the access units from the stream.
+        """
+        return self._next_access_unit()
+
+    def read(self):
+        """Read the next access unit from this stream.
+        """
+        try:
+            return self._next_access_unit()
+        except StopIteration:
+            raise EOFError
+
+    def rewind(self):
+        """Rewind to the start of the ES data, ready to read again.
+        """
+        if self.context == NULL:
+            raise TSToolsException('No access unit context to rewind')
+        retval = cwrapper.rewind_access_unit_context(self.context)
+        if retval != 0:
+            raise TSToolsException(
+                    'Error rewinding access unit context for file %s'%self.esfile.name)
+
+    def __getattr__(self,name):
+        # ``close()`` frees the context, but it is quite natural to ask
+        # (for instance) for ``found_end_of_sequence`` after a "with"
+        # block has closed us - that must not dereference NULL
+        if self.context == NULL:
+            raise TSToolsException('Access unit context is closed')
+        if name == 'access_unit_index':
+            return self.context.access_unit_index
+        elif name == 'found_end_of_sequence':
+            return self.context.end_of_sequence != NULL
+        elif name == 'found_end_of_stream':
+            return self.context.end_of_stream != NULL
+        else:
+            raise AttributeError
+
+    def close(self):
+        if self.context != NULL:
+            cwrapper.free_access_unit_context(&self.context)
+        self.esfile = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, etype, value, tb):
+        if tb is None:
+            # No exception, so just finish normally
+            self.close()
+        else:
+            # Exception occurred, so tidy up
+            self.close()
+            # And allow the exception to be re-raised
+            return False
+
 # =============================================================================
 # TS matters
 # =============================================================================
@@ -537,9 +810,9 @@ class PAT(object):
 
     def __setitem__(self,key,value):
         if not (0 <= key <= 0xFFFF):
-            raise ValueError,"Program number must be 0..65535, not %d"%key
+            raise ValueError("Program number must be 0..65535, not %d"%key)
         if not (0 <= value <= 0x1FFF):
-            raise ValueError,"PID must be 0..0x1fff, not %#04x"%value
+            raise ValueError("PID must be 0..0x1fff, not %#04x"%value)
         self._data[key] = value
 
     def __delitem__(self,key):
@@ -555,7 +828,7 @@ class PAT(object):
         return self._data == other._data
 
     def __iter__(self):
-        return self._data.iteritems()
+        return iter(self._data.items())
 
     def items(self):
         # Return the (program number, PMT PID) pairs from the PAT,
@@ -568,8 +841,7 @@ class PAT(object):
         order.
         """
         words = []
-        keys = self._data.keys()
-        keys.sort()
+        keys = sorted(self._data.keys())
         for key in keys:
             words.append('%d:%#x'%(key,self._data[key]))
         return 'PAT({%s})'%(','.join(words))
@@ -588,7 +860,7 @@ class PAT(object):
         """
         # XXX Is it worth maintaining an extra (reversed) dictionary instead?
         program_numbers = []
-        for prog_num, pid in self._data():
+        for prog_num, pid in self._data.items():
             if pid == PMT_pid:
                 program_numbers.append(prog_num)
         return program_numbers
@@ -629,14 +901,14 @@ class ProgramStream(object):
         return self.__str__()
 
     def report(self,indent=2):
-        print "%sPID %04x (%4d) -> Stream type %02x (%3d)"%(' '*indent,
+        print("%sPID %04x (%4d) -> Stream type %02x (%3d)"%(' '*indent,
                                                             self.elementary_PID,
                                                             self.elementary_PID,
                                                             self.stream_type,
-                                                            self.stream_type)
+                                                            self.stream_type))
         # XXX should actually output them as descriptors
         if self.es_info:
-            print "%s    ES info '%s'"%(' '*indent,_hexify_array(self.es_info))
+            print("%s    ES info '%s'"%(' '*indent,_hexify_array(self.es_info)))
 
 # XXX Should this be an extension type, and enforce the datatypes it can hold?
 # XXX Or is that just too much bother?
@@ -659,7 +931,7 @@ class PMT(object):
         self.PCR_pid = PCR_pid
 
         # Use an array for the same reasons discussed in TSPacket
-        self.program_info = array.array('B','')
+        self.program_info = array.array('B',b'')
         self.streams = []
 
     def set_program_info(self,program_info):
@@ -698,15 +970,15 @@ class PMT(object):
         return self.__str__()
 
     def report(self):
-        print "PMT program %d, version %d, PCR PID %04x (%d)"%(self.program_number,
+        print("PMT program %d, version %d, PCR PID %04x (%d)"%(self.program_number,
                                                                self.version_number,
                                                                self.PCR_pid,
-                                                               self.PCR_pid)
+                                                               self.PCR_pid))
         # XXX should actually output them as descriptors
         if self.program_info:
-            print "  Program info '%s'"%_hexify_array(self.program_info)
+            print("  Program info '%s'"%_hexify_array(self.program_info))
         if self.streams:
-            print "  Program streams:"
+            print("  Program streams:")
             for stream in self.streams:
                 stream.report(indent=4)
 
@@ -740,14 +1012,15 @@ cdef class TSPacket:
         self.data = array.array('B',buffer)
         # We *really* believe that the first character had better be 0x47...
         if self.data[0] != 0x47:
-            raise TSToolsException,\
-                    'First byte of TS packet is %#02x, not 0x47'%(ord(buffer[0]))
+            raise TSToolsException(
+                    'First byte of TS packet is %#02x, not 0x47'%(self.data[0]))
         # And the length is, well, defined
         if len(self.data) != TS_PACKET_LEN:
-            raise TSToolsException,\
-                    'TS packet is %d bytes long, not %d'%(len(self.data)) 
+            raise TSToolsException(
+                    'TS packet is %d bytes long, not %d'%(len(self.data),
+                                                          TS_PACKET_LEN))
         # The PID is useful to know early on, and fairly easy to work out
-        self.pid = ((ord(buffer[1]) & 0x1F) << 8) | ord(buffer[2])
+        self.pid = ((self.data[1] & 0x1F) << 8) | self.data[2]
 
     def __init__(self,pid=None,pusi=None,adapt=None,payload=None,data=None):
         pass
@@ -777,7 +1050,8 @@ cdef class TSPacket:
         return text
 
     def __repr__(self):
-        return 'TSPacket("%s")'%_hexify_array(self.data)
+        # The b prefix matters - a str cannot initialise our byte array
+        return 'TSPacket(b"%s")'%_hexify_array(self.data)
 
     def __richcmp__(self,other,op):
         if op == 2:     # ==
@@ -786,45 +1060,50 @@ cdef class TSPacket:
             return self.data != other.data
         else:
             #return NotImplementedError
-            raise TypeError, 'TSPacket only supports == and != comparisons'
+            raise TypeError('TSPacket only supports == and != comparisons')
 
     def _split(self):
         """Split the packet up when requested to do so.
         """
-        cdef const_void_ptr buffer
-        cdef Py_ssize_t     length
+        cdef Py_buffer      view
         cdef PID            pid
         cdef char          *adapt_buf
         cdef int            adapt_len
         cdef char          *payload_buf
         cdef int            payload_len
         cdef int            retval
-        PyObject_AsReadBuffer(self.data, &buffer, &length)
-        retval = cwrapper.split_TS_packet(<byte *>buffer,&pid,&self._pusi,
-                                 <byte **>&adapt_buf,&adapt_len,
-                                 <byte **>&payload_buf,&payload_len)
-        if retval != 0:
-            raise TSToolsException,'Error splitting TS packet data'
-        if adapt_len == 0:
-            self._adapt = None
-        else:
-            self._adapt = PyString_FromStringAndSize(adapt_buf,adapt_len)
-        if payload_len == 0:
-            self._payload = None
-        else:
-            self._payload = PyString_FromStringAndSize(payload_buf,payload_len)
+        # Our data is an array.array, so reach its bytes via the buffer
+        # protocol (PyObject_AsReadBuffer went away in Python 3.12)
+        PyObject_GetBuffer(self.data, &view, PyBUF_SIMPLE)
+        try:
+            retval = cwrapper.split_TS_packet(<byte *>view.buf,&pid,&self._pusi,
+                                     <byte **>&adapt_buf,&adapt_len,
+                                     <byte **>&payload_buf,&payload_len)
+            if retval != 0:
+                raise TSToolsException('Error splitting TS packet data')
+            if adapt_len == 0:
+                self._adapt = None
+            else:
+                self._adapt = PyBytes_FromStringAndSize(adapt_buf,adapt_len)
+            if payload_len == 0:
+                self._payload = None
+            else:
+                self._payload = PyBytes_FromStringAndSize(payload_buf,payload_len)
+        finally:
+            PyBuffer_Release(&view)
         self._already_split = True
 
     def _determine_PCR(self):
         """Determine our PCR, if we have one.
         Assumes that self._split() has been called already.
         """
-        cdef const_void_ptr adapt_buf
+        cdef char          *adapt_buf
         cdef Py_ssize_t     adapt_len
         cdef int            got_pcr
         cdef uint64_t       pcr
         if self._adapt:
-            PyObject_AsReadBuffer(self._adapt, &adapt_buf, &adapt_len)
+            # _split() made _adapt a bytes object, so this suffices
+            PyBytes_AsStringAndSize(self._adapt, &adapt_buf, &adapt_len)
             cwrapper.get_PCR_from_adaptation_field(<byte *>adapt_buf, adapt_len,
                                           &got_pcr, &pcr)
         else:
@@ -852,9 +1131,10 @@ cdef class TSPacket:
 cdef pat_from_prog_list(pidint_list_p prog_list):
     """Convert a program list into a PAT instance.
     """
+    cdef int ii
     try:
         pat = PAT()
-        for 0 <= ii < prog_list.length:
+        for ii in range(prog_list.length):
             pat[prog_list.number[ii]] = prog_list.pid[ii]
         return pat
     finally:
@@ -866,18 +1146,19 @@ cdef pmt_from_pmt_p(pmt_p pmt):
 
     Returns the new PMT object, or None if none
     """
+    cdef int ii
     try:
         this = PMT(pmt.program_number,
                    pmt.version_number,
                    pmt.PCR_pid)
 
-        prog_info = PyString_FromStringAndSize(<char *>pmt.program_info,
-                                               pmt.program_info_length)
+        prog_info = PyBytes_FromStringAndSize(<char *>pmt.program_info,
+                                              pmt.program_info_length)
         this.set_program_info(prog_info)
 
-        for 0 <= ii < pmt.num_streams:
-            es_info = PyString_FromStringAndSize(<char *>pmt.streams[ii].ES_info,
-                                                 pmt.streams[ii].ES_info_length)
+        for ii in range(pmt.num_streams):
+            es_info = PyBytes_FromStringAndSize(<char *>pmt.streams[ii].ES_info,
+                                                pmt.streams[ii].ES_info_length)
             stream = ProgramStream(pmt.streams[ii].stream_type,
                                    pmt.streams[ii].elementary_PID,
                                    es_info)
@@ -939,7 +1220,7 @@ cdef class _PAT_accumulator:
                                             self.pat_data,self.pat_data_len,
                                             &prog_list)
         if retval:
-            raise TSToolsException,'Error extracting program list from PAT'
+            raise TSToolsException('Error extracting program list from PAT')
         return pat_from_prog_list(prog_list)
 
 cdef class _PMT_accumulator:
@@ -989,7 +1270,7 @@ cdef class _PMT_accumulator:
         retval = cwrapper.extract_pmt(False, self.pmt_data, self.pmt_data_len,
                              self.pid, &pmt)
         if retval:
-            raise TSToolsException,'Error extracting PMT'
+            raise TSToolsException('Error extracting PMT')
         return pmt_from_pmt_p(pmt)
 
 cdef class TSFile:
@@ -1049,9 +1330,9 @@ cdef class TSFile:
         # a file more than once...
 
         if self.tsreader:       # Oh dear, we're already open
-            if filename != self.filename or mode != self.mode:
-                raise TSToolsException,"Attempt to reopen %s as '%s' with mode '%s'"%\
-                        (self.__repr__,filename,mode)
+            if filename != self.name or mode != self.mode:
+                raise TSToolsException("Attempt to reopen %s as '%s' with mode '%s'"%
+                        (self.__repr__,filename,mode))
             return
 
         self.name = filename
@@ -1061,15 +1342,19 @@ cdef class TSFile:
         self.PMT_data = {}
 
         if mode == 'r':
-            retval = cwrapper.open_file_for_TS_read(filename,&self.tsreader)
+            # The C library wants an encoded byte string for the filename
+            filename_b = filename.encode(sys.getfilesystemencoding()) \
+                    if isinstance(filename,str) else filename
+            retval = cwrapper.open_file_for_TS_read(filename_b,&self.tsreader)
             if retval == 1:
-                raise TSToolsException,"Error opening file '%s'"\
-                        " for TS reading: %s"%(filename,strerror(errno))
+                raise TSToolsException("Error opening file '%s'"
+                        " for TS reading: %s"%(filename,
+                                               strerror(errno).decode('utf-8')))
         elif mode == 'w':
-            raise NotImplementedError,"TSFile mode 'w' is not yet available"
+            raise NotImplementedError("TSFile mode 'w' is not yet available")
         else:
-            raise TSToolsException,"Error opening file '%s'"\
-                    " with mode '%s' (only 'r' and 'w' supported)"%(filename,mode)
+            raise TSToolsException("Error opening file '%s'"
+                    " with mode '%s' (only 'r' and 'w' supported)"%(filename,mode))
 
     def _clear_pat_data(self):
         """Clear the buffers we use to accumulate PAT data
@@ -1104,8 +1389,8 @@ cdef class TSFile:
             self.PMT = None
             retval = cwrapper.close_TS_reader(&self.tsreader)
             if retval != 0:
-                raise TSToolsException,"Error closing file '%s':"\
-                        " %s"%(self.name,strerror(errno))
+                raise TSToolsException("Error closing file '%s':"
+                        " %s"%(self.name,strerror(errno).decode('utf-8')))
 
     def __dealloc__(self):
         self._close_for_read()
@@ -1266,22 +1551,22 @@ cdef class TSFile:
         """
         cdef byte *buffer
         if self.tsreader == NULL:
-            raise TSToolsException,'No TS stream to read'
+            raise TSToolsException('No TS stream to read')
         retval = cwrapper.read_next_TS_packet(self.tsreader, &buffer)
         if retval == EOF:
             raise StopIteration
         elif retval == 1:
-            raise TSToolsException,'Error getting next TS packet from file %s'%self.name
+            raise TSToolsException('Error getting next TS packet from file %s'%self.name)
 
         # Remember the buffer we get handed a pointer to is transient
         # so we need to take a copy of it (which we might as well keep in
         # a Python object...)
-        buffer_str = PyString_FromStringAndSize(<char *>buffer, TS_PACKET_LEN)
+        buffer_str = PyBytes_FromStringAndSize(<char *>buffer, TS_PACKET_LEN)
         try:
             new_packet = TSPacket(buffer_str)
-        except TSToolsException, what:
-            raise TSToolsException,\
-                    'Error getting next TS packet from file %s (%s)'%(self.name,what)
+        except TSToolsException as what:
+            raise TSToolsException(
+                    'Error getting next TS packet from file %s (%s)'%(self.name,what))
 
         # Check whether this packet updates our idea of the current PAT
         # or PMT
@@ -1313,7 +1598,7 @@ cdef class TSFile:
         self.PAT = None
         retval = cwrapper.seek_using_TS_reader(self.tsreader,offset)
         if retval == 1:
-            raise TSToolsException,'Error seeking to %d in file %s'%(offset,self.name)
+            raise TSToolsException('Error seeking to %d in file %s'%(offset,self.name))
 
     def read(self):
         """Read the next TS packet from this stream.
@@ -1350,12 +1635,12 @@ cdef class TSFile:
         cdef pidint_list_p  prog_list
         cdef int            num_read
         if self.tsreader == NULL:
-            raise TSToolsException,'No TS stream to read'
+            raise TSToolsException('No TS stream to read')
         retval = cwrapper.find_pat(self.tsreader,max,verbose,quiet,&num_read,&prog_list)
         if retval == EOF:       # No PAT found
             return (num_read,None)
         elif retval == 1:
-            raise TSToolsException,'Error searching for next PAT'
+            raise TSToolsException('Error searching for next PAT')
         # Don't forget to remember it on the file as well
         self.PAT = pat_from_prog_list(prog_list)
         return (num_read,self.PAT)
@@ -1387,13 +1672,13 @@ cdef class TSFile:
         cdef int       num_read
         cdef unsigned  actual_prog_num
         if self.tsreader == NULL:
-            raise TSToolsException,'No TS stream to read'
+            raise TSToolsException('No TS stream to read')
         retval = cwrapper.find_next_pmt(self.tsreader,pmt_pid,program_number,max,verbose,quiet,
                                &num_read,&pmt)
         if retval == EOF:       # No PMT found
             return (num_read,None)
         elif retval == 1:
-            raise TSToolsException,'Error searching for next PMT'
+            raise TSToolsException('Error searching for next PMT')
         this_pmt = pmt_from_pmt_p(pmt)
 
         # Don't forget to remember it on the file as well
@@ -1465,7 +1750,7 @@ cdef class BufferedTSFile(TSFile):
         # Locate our first PMT
         (num_read,PAT) = self.find_PAT()
         if PAT is None:
-            raise TSToolsException,"Unable to find PAT in file '%s'"%self.name
+            raise TSToolsException("Unable to find PAT in file '%s'"%self.name)
 
         self.start_count = num_read
 
@@ -1473,14 +1758,14 @@ cdef class BufferedTSFile(TSFile):
         # by program number)
         programs = PAT.items()
         if len(programs) == 0:
-            raise TSToolsException,"No programs in first PAT in '%s'"%self.name
+            raise TSToolsException("No programs in first PAT in '%s'"%self.name)
 
         # Find the PMT for the first program
         (progno,PMT_pid) = programs[0]
         (num_read,PMT) = self.find_PMT(PMT_pid,progno)
         if PMT is None:
-            raise TSToolsException,"Unable to find PMT with PID %04x"\
-                    " for program %d in file '%s'"%(PMT_pid,progno,self.name)
+            raise TSToolsException("Unable to find PMT with PID %04x"
+                    " for program %d in file '%s'"%(PMT_pid,progno,self.name))
 
         self.start_count += num_read
         self.pcr_pid      = PMT.PCR_pid
@@ -1488,7 +1773,7 @@ cdef class BufferedTSFile(TSFile):
         # Tell the read mechanism which PCR PID we want to use
         retval = cwrapper.prime_read_buffered_TS_packet(self.tsreader,self.pcr_pid)
         if retval == 1:
-            raise TSToolsException,'Error priming PCR read ahead for file %s'%self.name
+            raise TSToolsException('Error priming PCR read ahead for file %s'%self.name)
 
 
     def __repr__(self):
@@ -1500,7 +1785,7 @@ cdef class BufferedTSFile(TSFile):
     def write(self, TSPacket tspacket):
         """BufferedTSFiles do not support writing.
         """
-        raise NotImplementedError,'BufferedTSFiles do not support writing'
+        raise NotImplementedError('BufferedTSFiles do not support writing')
 
     cdef TSPacket _next_TSPacket(self):
         """Read the next TS packet and return an equivalent TSPacket instance.
@@ -1513,7 +1798,7 @@ cdef class BufferedTSFile(TSFile):
         cdef uint64_t  pcr
         cdef uint32_t  count
         if self.tsreader == NULL:
-            raise TSToolsException,'No TS stream to read'
+            raise TSToolsException('No TS stream to read')
 
         if self.got_first:
             retval = cwrapper.read_next_TS_packet_from_buffer(self.tsreader, &buffer,
@@ -1526,20 +1811,20 @@ cdef class BufferedTSFile(TSFile):
         if retval == EOF:
             raise StopIteration
         elif retval == 1:
-            raise TSToolsException,'Error getting next TS packet from file %s'%self.name
+            raise TSToolsException('Error getting next TS packet from file %s'%self.name)
 
         self.got_first = True
 
         # Remember the buffer we get handed a pointer to is transient
         # so we need to take a copy of it (which we might as well keep in
         # a Python object...)
-        buffer_str = PyString_FromStringAndSize(<char *>buffer, TS_PACKET_LEN)
+        buffer_str = PyBytes_FromStringAndSize(<char *>buffer, TS_PACKET_LEN)
         try:
             # XXX And we really must tell the TSPacket that we *know* its PCR
             new_packet = TSPacket(buffer_str)
-        except TSToolsException, what:
-            raise TSToolsException,\
-                    'Error getting next TS packet from file %s (%s)'%(self.name,what)
+        except TSToolsException as what:
+            raise TSToolsException(
+                    'Error getting next TS packet from file %s (%s)'%(self.name,what))
 
         # Check whether this packet updates our idea of the current PAT
         # or PMT
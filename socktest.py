@@ -8,6 +8,7 @@ Command line - optionally:
     -output <filename>    defaults to None
     -file   <filename>    the same
     -nonblock             the socket should operate in non-blocking mode
+    -streams <n>          drive <n> concurrent connections (defaults to 1)
 
 followed by zero or more commands, specified as:
 
@@ -28,6 +29,12 @@ packets.
 The command "q" does not take a count, but reads the rest of the data packets.
 
 If no commands are given, the default is "n" with no count.
+
+With "-streams <n>" for n > 1, the script opens n connections to the same
+server and reads them all at once from a single process (one selector loop,
+no thread or process per stream). Only a single command is supported in this
+mode - it is sent on every connection, and each stream is then read to its
+end. If "-output" is given, stream i is written to <filename>.<i>.
 """
 
 # ***** BEGIN LICENSE BLOCK *****
@@ -56,33 +63,80 @@ If no commands are given, the default is "n" with no count.
 
 import sys
 import socket
+import selectors
+import time
 
 class DoneException(Exception):
     pass
 
 global total_packets
 
+# Progress dots are batched up rather than written (and flushed - a
+# syscall) per packet. We flush when enough have gathered, or when the
+# stream has gone quiet for a while (so a slow stream still shows signs
+# of life), or at the end of a command.
+_DOTS = bytearray()
+_DOT_THRESHOLD = 1024
+_DOT_INTERVAL = 0.5         # seconds
+_last_flush = time.monotonic()
+
+def _flush_dots():
+    global _last_flush
+    if _DOTS:
+        sys.stdout.write(_DOTS.decode('ascii'))
+        del _DOTS[:]
+    sys.stdout.flush()
+    _last_flush = time.monotonic()
+
+def _show_progress(text):
+    _DOTS.extend(text.encode('ascii'))
+    if len(_DOTS) >= _DOT_THRESHOLD or \
+            time.monotonic() - _last_flush > _DOT_INTERVAL:
+        _flush_dots()
+
+# A single preallocated packet buffer - ``recv_into`` reads straight into
+# it, so we don't build up each packet by (quadratic) string concatenation,
+# nor allocate a new buffer per packet. (We deliberately don't wrap the
+# socket in a buffered file object, since we interleave reading data with
+# sending commands, and may be non-blocking.)
+_BUF = bytearray(188)
+
+# MSG_WAITALL makes recv gather a full packet in one syscall (it exists
+# everywhere we care about, but be safe)
+_HAVE_WAITALL = hasattr(socket,'MSG_WAITALL')
+
 def get_packet(sock,packet_size=188):
     """Read a packet from the socket, coping with partial reads.
+
+    Returns the packet as a bytearray. Note that the result is only valid
+    until the next call - we reuse the same buffer each time.
     """
-    data = ""
+    buf = _BUF if packet_size == len(_BUF) else bytearray(packet_size)
+    view = memoryview(buf)
     total = 0
+    if _HAVE_WAITALL:
+        # On a blocking socket this returns the whole packet (or EOF) in
+        # a single syscall, instead of waking us for each fragment. With
+        # -nonblock it may still come back short, so the loop below
+        # finishes the job either way.
+        total = sock.recv_into(view,packet_size,socket.MSG_WAITALL)
+        if total == 0:
+            raise DoneException
     while total < packet_size:
-        data += sock.recv(packet_size - total)
-        if len(data) == 0:
+        received = sock.recv_into(view[total:packet_size])
+        if received == 0:
             raise DoneException
-        total += len(data)
-    return data
+        total += received
+    return buf
 
 def read_next_packet(sock,file=None):
     """Read the next packet from the socket, checking and counting it.
     """
     data = get_packet(sock)
-    if ord(data[0]) == 0x47 and len(data) == 188:
-        sys.stdout.write(".")
+    if data[0] == 0x47 and len(data) == 188:
+        _show_progress(".")
     else:
-        sys.stdout.write("[%x]/%d"%(ord(data[0]),len(data)))
-    sys.stdout.flush()
+        _show_progress("[%x]/%d"%(data[0],len(data)))
     global total_packets
     total_packets += 1
     if file:
@@ -97,11 +151,11 @@ def give_command(sock,command="n",file=None,howmany=None):
     Raises DoneException if there is no more data to read.
     """
     if howmany is None:
-        print "Sending command '%s' and listening"%command
+        print("Sending command '%s' and listening"%command)
     else:
-        print "Sending command '%s' and listening for %d packets"%(command,
-                                                                   howmany)
-    sock.send(command)
+        print("Sending command '%s' and listening for %d packets"%(command,
+                                                                   howmany))
+    sock.send(command.encode('ascii'))
     if howmany is None:
         while 1:
             read_next_packet(sock,file)
@@ -110,13 +164,82 @@ def give_command(sock,command="n",file=None,howmany=None):
             for count in range(howmany):
                 read_next_packet(sock,file)
         except DoneException:
+            _flush_dots()
             sys.stdout.write("\n")
             sys.stdout.write("Finished listening after %d packets"%count)
             raise DoneException
-        except socket.error, val:
-            print "socket.error:",val
+        except socket.error as val:
+            _flush_dots()
+            print("socket.error:",val)
             raise DoneException
-    print
+    _flush_dots()
+    print()
+
+class _Stream:
+    """The reading state for one of several concurrent streams.
+    """
+    def __init__(self,index,file=None):
+        self.index = index
+        self.file = file
+        self.buf = bytearray(188)
+        self.got = 0            # how much of the current packet we have
+        self.total = 0
+
+def run_streams(host,port,nstreams,command="n",filename=None):
+    """Drive `nstreams` concurrent connections with one selector loop.
+
+    The command is sent on each connection, and then every stream is read
+    to its end - the selector (epoll, on Linux) wakes us for whichever
+    sockets have data, so one process services all of the streams without
+    a thread or process per stream.
+
+    Returns the list of per-stream packet counts.
+    """
+    sel = selectors.DefaultSelector()
+    streams = []
+    for ii in range(nstreams):
+        sock = socket.socket(socket.AF_INET,socket.SOCK_STREAM)
+        sock.connect((host,port))
+        sock.send(command.encode('ascii'))
+        sock.setblocking(False)
+        file = None
+        if filename:
+            file = open('%s.%d'%(filename,ii),'wb')
+        stream = _Stream(ii,file)
+        streams.append(stream)
+        sel.register(sock,selectors.EVENT_READ,stream)
+    print("Sent command '%s' on %d connections, listening"%(command,nstreams))
+    open_count = nstreams
+    while open_count > 0:
+        for key,events in sel.select():
+            sock = key.fileobj
+            stream = key.data
+            try:
+                received = sock.recv_into(memoryview(stream.buf)[stream.got:])
+            except BlockingIOError:
+                continue        # the selector was optimistic - never mind
+            if received == 0:
+                # This stream is done (a trailing partial packet is
+                # dropped, as ever)
+                sel.unregister(sock)
+                sock.close()
+                if stream.file:
+                    stream.file.close()
+                open_count -= 1
+                continue
+            stream.got += received
+            if stream.got == 188:       # we have a whole packet
+                if stream.buf[0] == 0x47:
+                    _show_progress(".")
+                else:
+                    _show_progress("[%x]/%d"%(stream.buf[0],len(stream.buf)))
+                if stream.file:
+                    stream.file.write(stream.buf)
+                stream.total += 1
+                stream.got = 0
+    sel.close()
+    _flush_dots()
+    return [stream.total for stream in streams]
 
 def main():
     global total_packets
@@ -125,14 +248,15 @@ def main():
     port = 8889
     stream = filename = None
     nonblock = 0
+    nstreams = 1
 
     argv = sys.argv[1:]
     if len(argv) == 0:
-        print __doc__
+        print(__doc__)
         return
     while len(argv) > 0 and argv[0].startswith("-"):
         if argv[0] in ("-h", "-help", "--help"):
-            print __doc__
+            print(__doc__)
             return
         elif argv[0] == "-host":
             host = argv[1]
@@ -146,13 +270,16 @@ def main():
         elif argv[0] in ("-nonblock"):
             nonblock = 1
             argv = argv[1:]
+        elif argv[0] == "-streams":
+            nstreams = int(argv[1])
+            argv = argv[2:]
         else:
-            print "Unexpected switch",argv[0]
+            print("Unexpected switch",argv[0])
             return
 
     commands = []
     if len(argv) == 0:
-        print "No commands specified - assuming 'n'ormal play"
+        print("No commands specified - assuming 'n'ormal play")
         commands = [("n",None)]
 
     command = None
@@ -162,7 +289,7 @@ def main():
             try:
                 count = int(word)
             except:
-                print "'%s' does not work as a count for command '%s'"%(word,command)
+                print("'%s' does not work as a count for command '%s'"%(word,command))
                 return
             commands.append((command,count))
             command = None
@@ -176,18 +303,33 @@ def main():
                       "0", "1", "2", "3", "4", "5", "6", "7", "8", "9"):  # commands that do take a count
             command = word
         else:
-            print "Unrecognised command '%s'"%word
+            print("Unrecognised command '%s'"%word)
     if command:
         commands.append((command,None))
 
-    print "Commands:", commands
+    print("Commands:", commands)
+
+    if nstreams > 1:
+        # Several concurrent streams, one selector loop. Only a single
+        # command makes sense here - it goes to every connection.
+        if len(commands) > 1:
+            print("Multiple commands are not supported with -streams -"
+                  " using '%s'"%commands[0][0])
+        print("Connecting to %s on port %d, %d streams"%(host,port,nstreams))
+        totals = run_streams(host,port,nstreams,command=commands[0][0],
+                             filename=filename)
+        sys.stdout.write("\n")
+        for index,count in enumerate(totals):
+            sys.stdout.write("Stream %d: %d packets\n"%(index,count))
+        sys.stdout.write("Total packets: %d\n"%sum(totals))
+        return
 
     sock = socket.socket(socket.AF_INET,socket.SOCK_STREAM)
-    print "Connecting to %s on port %d"%(host,port)
+    print("Connecting to %s on port %d"%(host,port))
     sock.connect((host,port))
     if filename:
-        print "Writing output to file %s"%filename
-        stream = file(filename,"wb")
+        print("Writing output to file %s"%filename)
+        stream = open(filename,"wb")
 
     if nonblock:
         sock.setblocking(0)
@@ -198,6 +340,7 @@ def main():
     except (KeyboardInterrupt, DoneException):
         if stream:
             stream.close()
+    _flush_dots()
     sys.stdout.write("\n")
     sys.stdout.write("Total packets: %d\n"%total_packets)
     sock.close()
@@ -208,4 +351,4 @@ if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
-        print
+        print()
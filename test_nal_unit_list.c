@@ -35,7 +35,7 @@
 int main(int argc, char **argv)
 {
   int  err, ii;
-  int  max = NAL_UNIT_LIST_START_SIZE + NAL_UNIT_LIST_INCREMENT + 3;
+  int  max = NAL_UNIT_LIST_START_SIZE*2 + 3;  // just past the first doubling
   nal_unit_list_p  list = NULL;
   nal_unit_p       unit = NULL;
 
@@ -96,7 +96,7 @@ int main(int argc, char **argv)
   }
 
   // And try populating the list again, but a bit further this time
-  for (ii=0; ii<max+NAL_UNIT_LIST_INCREMENT; ii++)
+  for (ii=0; ii<max*2; ii++)  // and past another doubling this time
   {
     err = build_nal_unit(&unit);
     if (err)